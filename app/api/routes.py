@@ -2,7 +2,9 @@ from fastapi import APIRouter, HTTPException, Header, Depends
 from pydantic import BaseModel, HttpUrl
 from typing import Optional, Dict, Any, List
 import asyncio
+import re
 from datetime import datetime
+from functools import lru_cache
 from ..services.web_parser import web_parser
 from ..services.markdown_converter import markdown_converter
 from ..services.image_uploader import image_uploader
@@ -17,6 +19,41 @@ from ..utils.debug_manager import debug_manager
 
 router = APIRouter()
 
+# 出现任一字符就需要用双引号包裹的 YAML 特殊字符，一次扫描完成判断；
+# 制表符（PyYAML 不接受纯量中的制表符）和其他控制字符（C0、DEL 与 C1）不允许裸写在 YAML 中，
+# 也要引号包裹后转义；U+2028/U+2029 会被当作换行，U+FFFE/U+FFFF 不是合法字符，同样处理。
+# , & * ! | > % @ ` 等指示符只在开头有特殊含义（front matter 是块上下文，出现在中间
+# 不影响解析），不放进这里，由下面的 _MUST_QUOTE_LEADS 检查首字符
+_YAML_SPECIAL = re.compile(r'[:#"\'\t\n\r\[\]{}\\\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\u2028\u2029\ufffe\uffff]')
+# 出现在开头时会被 YAML 当作指示符（序列、映射键、流集合、锚点、别名、标签、块标量、保留字符）
+# 的字符，以及会被裁掉的前导空白；数字开头不在此列，日期、数值字段保持原样输出
+_MUST_QUOTE_LEADS = frozenset('-?!&*[{,>|%@` \t')
+# 双引号字符串的转义表，单次 translate 完成全部替换
+_ESCAPE_TABLE = str.maketrans({
+    **{chr(code): f'\\x{code:02x}' for code in (*range(0x20), *range(0x7f, 0xa0))},
+    **{chr(code): f'\\u{code:04x}' for code in (0x2028, 0x2029, 0xfffe, 0xffff)},
+    '\\': '\\\\',
+    '"': '\\"',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
+# front matter 中按列表输出的 LLM 字段，顺序即输出顺序
+_LLM_LIST_FIELDS = (
+    'score_plus',
+    'score_minus',
+    'entities_company_worldwide',
+    'entities_company_domestic',
+    'entities_vip_worldwide',
+    'entities_vip_domestic',
+    'entities_industry_upper',
+    'entities_industry_mid',
+    'entities_industry_lower',
+    'paragraphs',
+    'hidden_info',
+    'golden_sentences',
+)
+
 class ClipRequest(BaseModel):
     url: HttpUrl
 
@@ -54,6 +91,19 @@ async def verify_api_key(x_api_key: str = Header(None)):
         )
     return True
 
+def _quote_yaml_string(value: str) -> str:
+    """转义反斜杠、双引号和控制字符，并用双引号包裹
+
+    Args:
+        value: 原始字符串
+
+    Returns:
+        str: YAML 双引号字符串
+    """
+    # f-string 由 BUILD_STRING 一次拼出结果，不产生 '"' + body 的中间字符串
+    return f'"{value.translate(_ESCAPE_TABLE)}"'
+
+
 def _format_yaml_list(items: List[str], indent: int = 2) -> str:
     """格式化列表为 YAML 格式
 
@@ -67,18 +117,20 @@ def _format_yaml_list(items: List[str], indent: int = 2) -> str:
     if not items:
         return "[]"
 
-    indent_str = " " * indent
-    escaped_items = []
-    for item in items:
-        # 转义双引号和反斜杠，确保 YAML 解析正确
-        escaped = item.replace('\\', '\\\\').replace('"', '\\"')
-        escaped_items.append(f'\n{indent_str}- "{escaped}"')
-    return "".join(escaped_items)
+    # 每项共用的前缀只拼一次，循环内直接字符串相加
+    prefix = "\n" + " " * indent + "- "
+    # 绑定为局部变量，循环内按局部名查找，省去每项一次全局查找
+    quote = _quote_yaml_string
+    # 列表项一律加引号，避免 "123"、"true" 之类被解析成数字或布尔值
+    return "".join([prefix + quote(item) for item in items])
 
 
+@lru_cache(maxsize=4096)
 def _escape_yaml_string(value: str) -> str:
     """转义 YAML 字符串中的特殊字符
 
+    纯函数，结果按输入缓存；重复出现的标题、作者、分类等无需重新扫描。
+
     Args:
         value: 原始字符串
 
@@ -87,13 +139,16 @@ def _escape_yaml_string(value: str) -> str:
     """
     if not value:
         return ""
-    # 如果包含特殊字符，用引号包裹并转义
-    special_chars = [':', '#', '"', "'", '\n', '[', ']', '{', '}', '\\']
-    if any(c in value for c in special_chars):
-        # 先转义反斜杠，再转义双引号
-        escaped = value.replace('\\', '\\\\').replace('"', '\\"')
-        return f'"{escaped}"'
-    return value
+    # 大多数字段既不以指示符开头、也不以空格结尾（解析时会被裁掉）、也不含特殊字符，
+    # 先判断并直接返回原值
+    if (
+        value[0] not in _MUST_QUOTE_LEADS
+        and value[-1] != ' '
+        and _YAML_SPECIAL.search(value) is None
+    ):
+        return value
+    # 包含特殊字符，用引号包裹并转义
+    return _quote_yaml_string(value)
 
 
 def generate_yaml_front_matter(
@@ -116,38 +171,29 @@ def generate_yaml_front_matter(
     # 使用 Obsidian 格式的时间戳：YYYY-MM-DD HH:mm
     created = datetime.now().strftime("%Y-%m-%d %H:%M")
 
-    # 基础字段
-    yaml_content = f"""---
-url: {_escape_yaml_string(url)}
-title: {_escape_yaml_string(title)}
-description: {_escape_yaml_string(meta_info.get('description', ''))}
-author: {_escape_yaml_string(meta_info.get('author', ''))}
-published: {_escape_yaml_string(meta_info.get('date', ''))}
-created: {created}"""
+    # 基础字段（逐行收集，最后一次性拼接）
+    lines = [
+        "---",
+        f"url: {_escape_yaml_string(url)}",
+        f"title: {_escape_yaml_string(title)}",
+        f"description: {_escape_yaml_string(meta_info.get('description', ''))}",
+        f"author: {_escape_yaml_string(meta_info.get('author', ''))}",
+        f"published: {_escape_yaml_string(meta_info.get('date', ''))}",
+        f"created: {created}",
+    ]
 
     # 如果有 LLM 结果，添加 LLM 生成的字段
     if llm_result and llm_result.success:
         llm_data = llm_result.to_yaml_dict()
 
-        yaml_content += f"""
-category: {_escape_yaml_string(llm_data.get('category', ''))}
-new_title: {_escape_yaml_string(llm_data.get('new_title', ''))}
-score: {llm_data.get('score', 0)}
-score_plus: {_format_yaml_list(llm_data.get('score_plus', []))}
-score_minus: {_format_yaml_list(llm_data.get('score_minus', []))}
-entities_company_worldwide: {_format_yaml_list(llm_data.get('entities_company_worldwide', []))}
-entities_company_domestic: {_format_yaml_list(llm_data.get('entities_company_domestic', []))}
-entities_vip_worldwide: {_format_yaml_list(llm_data.get('entities_vip_worldwide', []))}
-entities_vip_domestic: {_format_yaml_list(llm_data.get('entities_vip_domestic', []))}
-entities_industry_upper: {_format_yaml_list(llm_data.get('entities_industry_upper', []))}
-entities_industry_mid: {_format_yaml_list(llm_data.get('entities_industry_mid', []))}
-entities_industry_lower: {_format_yaml_list(llm_data.get('entities_industry_lower', []))}
-paragraphs: {_format_yaml_list(llm_data.get('paragraphs', []))}
-hidden_info: {_format_yaml_list(llm_data.get('hidden_info', []))}
-golden_sentences: {_format_yaml_list(llm_data.get('golden_sentences', []))}"""
-
-    yaml_content += "\n---\n\n"
-    return yaml_content
+        lines.append(f"category: {_escape_yaml_string(llm_data.get('category', ''))}")
+        lines.append(f"new_title: {_escape_yaml_string(llm_data.get('new_title', ''))}")
+        lines.append(f"score: {llm_data.get('score', 0)}")
+        for key in _LLM_LIST_FIELDS:
+            lines.append(f"{key}: {_format_yaml_list(llm_data.get(key, []))}")
+
+    lines.append("---\n\n")
+    return "\n".join(lines)
 
 @router.post("/clip", response_model=ClipResponse)
 async def clip_article(
@@ -190,13 +236,13 @@ async def clip_article(
                 if config.content_fetcher_fallback:
                     logger.warning(f"[UrlParse] 外部 API 失败，回退到内置解析: {e}")
                     notifier.send_progress("内容获取", f"[WARN] 外部 API 失败，回退到内置解析: {str(e)[:80]}")
-                    title, html, cleaned_html, meta_info = web_parser.parse_url(str(request.url))
-                    markdown, images = markdown_converter.convert(cleaned_html)
+                    title, html, cleaned_html, meta_info, final_url = await web_parser.parse_url(str(request.url))
+                    markdown, images = markdown_converter.convert(cleaned_html, final_url)
                 else:
                     raise
         else:
-            title, html, cleaned_html, meta_info = web_parser.parse_url(str(request.url))
-            markdown, images = markdown_converter.convert(cleaned_html)
+            title, html, cleaned_html, meta_info, final_url = await web_parser.parse_url(str(request.url))
+            markdown, images = markdown_converter.convert(cleaned_html, final_url)
         
         # 3. 并行处理：图片上传 + LLM 处理
         # 创建并行任务
@@ -141,6 +141,11 @@ class Config:
         """external 失败时是否回退到 builtin"""
         return self.get('content_fetcher.fallback', True)
 
+    @property
+    def content_fetcher_builtin_max_html_bytes(self) -> int:
+        """内置解析允许下载的网页大小上限（字节），默认 20 MB"""
+        return self.get('content_fetcher.builtin.max_html_bytes', 20 * 1024 * 1024)
+
     @property
     def content_fetcher_external_url(self) -> str:
         """外部 URL Parse API 地址"""
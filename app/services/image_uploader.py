@@ -120,7 +120,8 @@ class ImageUploader:
             image_data = await self._download_image(session, image_url)
 
             # 保存调试文件
-            debug_manager.save_binary_file(f"image_{filename}", image_data, prefix="img")
+            if debug_manager.enabled:
+                debug_manager.save_binary_file(f"image_{filename}", image_data, prefix="img")
 
             # 上传到图床
             new_url = await self._upload_to_picgo(session, image_data, filename)
@@ -179,11 +180,12 @@ class ImageUploader:
                 url_mapping = {old_url: new_url for old_url, new_url in results}
                 
                 # 保存 URL 映射到调试文件
-                debug_manager.save_file(
-                    "url_mapping.json",
-                    json.dumps(url_mapping, ensure_ascii=False, indent=2),
-                    prefix="img"
-                )
+                if debug_manager.enabled:
+                    debug_manager.save_file(
+                        "url_mapping.json",
+                        json.dumps(url_mapping, ensure_ascii=False, indent=2),
+                        prefix="img"
+                    )
                 
                 # 打印处理结果
                 elapsed = time.time() - start_time
@@ -198,15 +200,16 @@ class ImageUploader:
         start_time = time.time()  # 使用局部变量
         logger.debug("开始替换图片 URL")
         
-        # 保存替换前的 Markdown（调试用）
-        debug_manager.save_file("before_replace.md", markdown, prefix="img")
-
-        # 保存 URL 映射关系（调试用）
-        debug_manager.save_file(
-            "replace_mapping.json",
-            json.dumps(url_mapping, indent=2, ensure_ascii=False),
-            prefix="img"
-        )
+        if debug_manager.enabled:
+            # 保存替换前的 Markdown（调试用）
+            debug_manager.save_file("before_replace.md", markdown, prefix="img")
+
+            # 保存 URL 映射关系（调试用）
+            debug_manager.save_file(
+                "replace_mapping.json",
+                json.dumps(url_mapping, indent=2, ensure_ascii=False),
+                prefix="img"
+            )
         
         # 替换每个图片 URL
         for old_url, new_url in url_mapping.items():
@@ -221,7 +224,8 @@ class ImageUploader:
             markdown = markdown.replace(old_url, new_url)
         
         # 保存最终的 Markdown（调试用）
-        debug_manager.save_file("final.md", markdown, prefix="img")
+        if debug_manager.enabled:
+            debug_manager.save_file("final.md", markdown, prefix="img")
         
         elapsed = time.time() - start_time  # 使用局部变量计算耗时
         logger.debug(f"URL 替换完成，耗时: {elapsed:.2f}秒")
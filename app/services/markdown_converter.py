@@ -4,16 +4,82 @@ Markdown 转换服务模块
 负责将 HTML 转换为 Markdown 格式。
 """
 
-from bs4 import BeautifulSoup
 import re
 import time
-from typing import List, Tuple
-from markdownify import markdownify as md
+from typing import TYPE_CHECKING, List, Tuple
+from urllib.parse import urlparse
 from ..services.notification import notifier
 from ..config import config
 from ..logger import logger
 from ..utils.debug_manager import debug_manager
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+# 匹配行尾的 Markdown 链接。方括号/圆括号内使用否定字符类而非 .*?，保证在括号
+# 不平衡的长行上也是线性扫描；链接文本允许一层嵌套方括号（如 [PDF [2]](url)），
+# 链接地址和标题允许一层成对圆括号（如维基百科的 Python_(programming_language)），
+# 更深的嵌套不再匹配
+_LINK_LINE_END_RE = re.compile(
+    r'(\[(?:[^\[\]\n]|\[[^\[\]\n]*\])*\]\((?:[^()\[\n]|\([^()\[\n]*\))*\))\n'
+)
+
+# 有效链接（有 href 且不是 javascript 链接）
+_VALID_LINK_SELECTOR = 'a[href]:not([href=""]):not([href*="javascript:"])'
+
+# markdownify 转换器实例（延迟创建，见 _get_md_converter）
+_md_converter = None
+
+
+def _get_md_converter():
+    """获取全局 markdownify 转换器实例（单例模式）
+
+    转换器在转换过程中顺带处理无效链接（无 href 或 javascript 链接只保留文本），
+    省去 _clean_html 中单独的一轮链接遍历；实例只创建一次，复用转换选项。
+
+    Returns:
+        markdownify.MarkdownConverter 子类实例
+    """
+    global _md_converter
+
+    if _md_converter is not None:
+        return _md_converter
+
+    # 延迟导入：markdownify 只在真正转换时才加载，缩短冷启动并减少常驻内存
+    from markdownify import MarkdownConverter as _BaseConverter
+
+    class _ClipMarkdownConverter(_BaseConverter):
+        """剪藏用 markdownify 转换器"""
+
+        def convert_a(self, el, text, *args, **kwargs):
+            href = el.get('href', '')
+            if not href or 'javascript:' in href:
+                # 如果没有链接或是 javascript 链接，只保留文本
+                return text.strip()
+            return super().convert_a(el, text, *args, **kwargs)
+
+    _md_converter = _ClipMarkdownConverter(
+        heading_style="ATX",  # 使用 # 样式的标题
+        bullets="-",  # 使用 - 作为无序列表标记
+        autolinks=True,  # 自动转换链接
+        wrap=False,  # 不自动换行
+        default_title=True,  # 使用默认标题
+        escape_underscores=True,  # 转义下划线
+        newline_style="\n",  # 使用 \n 作为换行符
+        strip=['script', 'style', 'meta', 'link', 'noscript', 'iframe'],  # 要移除的标签
+        options={
+            'emphasis_mark': '*',  # 使用 * 作为强调标记
+            'code_mark': '`',  # 使用 ` 作为代码标记
+            'hr_mark': '---',  # 使用 --- 作为分隔线
+            'br_mark': '  \n',  # 使用两个空格加换行作为软换行
+            'strong_mark': '**',  # 使用 ** 作为加粗标记
+            'link_brackets': True,  # 使用 [] 和 () 包裹链接
+            'convert_links': True,  # 转换链接
+            'keep_links': True,  # 保持链接
+        }
+    )
+    return _md_converter
+
 
 class MarkdownConverter:
     """Markdown 转换服务，负责将 HTML 转换为 Markdown"""
@@ -34,6 +100,8 @@ class MarkdownConverter:
         Returns:
             List[Tuple[str, str]]: 图片链接和 alt 文本的列表
         """
+        from bs4 import BeautifulSoup
+
         start_time = time.time()
         logger.debug("开始提取图片链接")
 
@@ -50,8 +118,8 @@ class MarkdownConverter:
                 # 在原始 HTML 中标记已处理的图片
                 img['data-processed'] = 'true'
         
-        # 保存图片链接列表（调试用）
-        if images:
+        # 保存图片链接列表（调试用，未开启 debug 时不拼接内容）
+        if images and debug_manager.enabled:
             debug_manager.save_file(
                 "images.txt",
                 "\n".join([f"{src}\t{alt}" for src, alt in images]),
@@ -62,38 +130,32 @@ class MarkdownConverter:
         logger.debug(f"图片链接提取完成，找到 {len(images)} 张图片，耗时: {elapsed:.2f}秒")
         return images
 
-    def _clean_html(self, html: str) -> str:
-        """清理 HTML，移除不需要的标签，并保持正确的段落格式"""
+    def _clean_html(self, html: str) -> "BeautifulSoup":
+        """清理 HTML，移除不需要的标签，并保持正确的段落格式
+
+        无效链接的处理放在 markdownify 转换阶段（见 _get_md_converter）。
+
+        Returns:
+            BeautifulSoup: 清理后的文档树，可直接交给 markdownify 转换
+        """
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html, 'html.parser')
         
         # 移除不需要的标签
         for tag in soup(['script', 'style', 'meta', 'link', 'noscript', 'iframe']):
             tag.decompose()
             
-        # 移除空的 span 标签
+        # 移除空的 span 标签：去掉空白（含 &nbsp;）后没有文本的都算空，
+        # 包括只有 <br> 的占位 span；仅包含图片的 span 保留，避免丢图
         for span in soup.find_all('span'):
-            if not span.get_text(strip=True):
+            if not span.get_text(strip=True) and span.find('img') is None:
                 span.decompose()
                 
-        # 处理链接
-        for a in soup.find_all('a'):
-            href = a.get('href', '')
-            text = a.get_text(strip=True)
-            
-            if not href or 'javascript:' in href:
-                # 如果没有链接或是 javascript 链接，只保留文本
-                if text:
-                    a.replace_with(text)
-                else:
-                    a.decompose()
-            else:
-                # 保留有效的链接，不修改链接文本
-                continue
-
         # 处理 section 标签
         for section in soup.find_all('section'):
-            # 检查 section 是否包含链接或标题
-            links = section.find_all('a')
+            # 检查 section 是否包含有效链接或标题
+            links = section.select(_VALID_LINK_SELECTOR)
             headings = section.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
             images = section.find_all('img')
 
@@ -121,7 +183,7 @@ class MarkdownConverter:
             if h.next_sibling:
                 h.append(soup.new_string('\n\n'))
         
-        return str(soup)
+        return soup
 
     def _extract_wechat_js_content(self, html: str) -> str:
         """从微信公众号 JavaScript 变量中提取文章内容
@@ -202,6 +264,23 @@ class MarkdownConverter:
         logger.debug(f"从微信 picture_page_info_list 提取到 {len(images)} 张主图")
         return images
 
+    def _is_wechat_article(self, html: str, url: str) -> bool:
+        """判断是否可能是微信公众号文章
+
+        优先按来源 URL 的主机名判断；未提供 URL 时保持旧行为，视为可能是微信文章。
+        只检查 HTML 开头的有限片段，避免对整篇文档做全文扫描。
+
+        Args:
+            html: 原始 HTML
+            url: 来源 URL，可为空
+
+        Returns:
+            bool: 是否需要执行微信公众号相关的处理
+        """
+        if not url or urlparse(url).hostname == 'mp.weixin.qq.com':
+            return True
+        return 'rich_media_content' in html[:4096]
+
     def _clean_wechat_content(self, html: str) -> str:
         """清理微信公众号文章的额外内容
 
@@ -247,21 +326,34 @@ class MarkdownConverter:
         logger.info("[MarkdownConverter] 解析方式: 原始HTML（非微信文章或格式未识别）")
         return html
 
-    def convert(self, html: str) -> Tuple[str, List[Tuple[str, str]]]:
-        """将 HTML 转换为 Markdown，并提取图片信息"""
+    def convert(self, html: str, url: str = "") -> Tuple[str, List[Tuple[str, str]]]:
+        """将 HTML 转换为 Markdown，并提取图片信息
+
+        Args:
+            html: 网页 HTML
+            url: 来源 URL，用于跳过非微信文章的微信专用处理；为空时全部执行
+
+        Returns:
+            Tuple[str, List[Tuple[str, str]]]: Markdown 内容和图片列表
+        """
         try:
             start_time = time.time()
             logger.info("[MarkdownConverter] 开始转换 HTML 到 Markdown")
 
             # 保存原始 HTML（调试用）
-            debug_manager.save_file("original.html", html, prefix="md")
+            if debug_manager.enabled:
+                debug_manager.save_file("original.html", html, prefix="md")
 
-            # 先从原始 HTML 提取微信正文图片（在清理之前）
-            # 微信公众号的正文图片存储在 JS 变量中，清理后会丢失
-            wechat_images = self._extract_wechat_images(html)
+            wechat_images = []
+            if self._is_wechat_article(html, url):
+                # 先从原始 HTML 提取微信正文图片（在清理之前）
+                # 微信公众号的正文图片存储在 JS 变量中，清理后会丢失
+                wechat_images = self._extract_wechat_images(html)
 
-            # 清理微信公众号文章的额外内容
-            html = self._clean_wechat_content(html)
+                # 清理微信公众号文章的额外内容
+                html = self._clean_wechat_content(html)
+            else:
+                logger.info("[MarkdownConverter] 解析方式: 原始HTML（非微信文章）")
 
             # 从清理后的 HTML 提取 img 标签中的图片
             tag_images = self._extract_images(html)
@@ -278,38 +370,20 @@ class MarkdownConverter:
                 logger.info(f"[MarkdownConverter] 图片来源: 微信JS={len(wechat_images)}, HTML标签={len(tag_images)}, 合并后={len(images)}")
             
             # 清理 HTML
-            html = self._clean_html(html)
+            soup = self._clean_html(html)
             
             # 保存处理后的 HTML（调试用）
-            debug_manager.save_file("processed.html", html, prefix="md")
+            if debug_manager.enabled:
+                debug_manager.save_file("processed.html", str(soup), prefix="md")
             
-            # 使用 markdownify 转换为 Markdown
-            markdown = md(html,
-                heading_style="ATX",  # 使用 # 样式的标题
-                bullets="-",  # 使用 - 作为无序列表标记
-                autolinks=True,  # 自动转换链接
-                wrap=False,  # 不自动换行
-                default_title=True,  # 使用默认标题
-                escape_underscores=True,  # 转义下划线
-                newline_style="\n",  # 使用 \n 作为换行符
-                strip=['script', 'style', 'meta', 'link', 'noscript', 'iframe'],  # 要移除的标签
-                options={
-                    'emphasis_mark': '*',  # 使用 * 作为强调标记
-                    'code_mark': '`',  # 使用 ` 作为代码标记
-                    'hr_mark': '---',  # 使用 --- 作为分隔线
-                    'br_mark': '  \n',  # 使用两个空格加换行作为软换行
-                    'strong_mark': '**',  # 使用 ** 作为加粗标记
-                    'link_brackets': True,  # 使用 [] 和 () 包裹链接
-                    'convert_links': True,  # 转换链接
-                    'keep_links': True,  # 保持链接
-                }
-            )
+            # 直接转换清理后的文档树，无需序列化后再由 markdownify 重新解析
+            markdown = _get_md_converter().convert_soup(soup)
             
             # 处理连续的空行，最多保留两个换行
             markdown = re.sub(r'\n{3,}', '\n\n', markdown)
 
             # 处理链接之间的换行，确保每个链接后有两个换行符
-            markdown = re.sub(r'(\[.*?\]\(.*?\))\n', r'\1\n\n', markdown)
+            markdown = _LINK_LINE_END_RE.sub(r'\1\n\n', markdown)
 
             # 如果有从微信 JS 变量提取的图片，但 Markdown 中没有图片标记，
             # 需要将图片插入到正文中（因为 JS 变量提取模式下正文不包含图片）
@@ -320,7 +394,8 @@ class MarkdownConverter:
                 markdown = image_section + '\n\n' + markdown
 
             # 保存转换后的 Markdown（调试用）
-            debug_manager.save_file("result.md", markdown, prefix="md")
+            if debug_manager.enabled:
+                debug_manager.save_file("result.md", markdown, prefix="md")
             
             elapsed = time.time() - start_time
             logger.info(f"[MarkdownConverter] 转换完成: images={len(images)}, time={elapsed:.2f}s")
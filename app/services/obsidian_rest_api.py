@@ -6,6 +6,7 @@ Obsidian REST API 服务模块
 
 import aiohttp
 import asyncio
+import orjson
 import re
 from datetime import datetime
 from typing import Optional, Dict, Any
@@ -34,6 +35,21 @@ class ObsidianRestAPIService:
         # 确保路径不以斜杠开头或结尾
         self.clippings_path = self.clippings_path.strip('/')
 
+        # 预先构建请求头，避免每次请求（含重试）重复拼接鉴权信息；
+        # 这些字典在请求中只读共享，不要就地修改
+        self._auth_headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Accept': '*/*'
+        }
+        self._put_headers = {
+            **self._auth_headers,
+            'Content-Type': 'text/markdown'
+        }
+        self._get_headers = {
+            **self._auth_headers,
+            'Accept': 'application/json'
+        }
+
     def _normalize_url(self, url: str) -> str:
         """规范化和验证 URL
         
@@ -124,11 +140,8 @@ class ObsidianRestAPIService:
             Exception: 网络或 API 错误
         """
         url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
-        headers = {
-            'Authorization': f'Bearer {self.api_key}',
-            'Accept': '*/*',
-            **kwargs.pop('headers', {})
-        }
+        extra_headers = kwargs.pop('headers', None)
+        headers = {**self._auth_headers, **extra_headers} if extra_headers else self._auth_headers
         
         # 记录请求详情（调试模式）
         if config.debug:
@@ -157,7 +170,7 @@ class ObsidianRestAPIService:
         status = response.status
         
         try:
-            error_data = await response.json()
+            error_data = orjson.loads(await response.read())
             error_message = error_data.get('message', '未知错误')
         except:
             error_message = await response.text() or f'HTTP {status} 错误'
@@ -188,18 +201,15 @@ class ObsidianRestAPIService:
             Exception: 保存失败时抛出异常
         """
         file_path = self.generate_file_path(title)
-        
+        # 只编码一次，重试时复用同一份 bytes（aiohttp 会据此设置 Content-Length）
+        body = content.encode('utf-8')
+
         for attempt in range(self.retry_count + 1):
             try:
                 notifier.send_progress("文档保存", f"正在保存到 Obsidian: {file_path}")
                 
                 # 直接在这里处理请求和响应
                 request_url = f"{self.base_url}/vault/{file_path}"
-                headers = {
-                    'Authorization': f'Bearer {self.api_key}',
-                    'Content-Type': 'text/markdown',
-                    'Accept': '*/*'
-                }
                 
                 if config.debug:
                     notifier.send_progress("调试", f"PUT {request_url}")
@@ -209,16 +219,17 @@ class ObsidianRestAPIService:
                 async with aiohttp.ClientSession(timeout=timeout) as session:
                     async with session.put(
                         request_url, 
-                        headers=headers, 
-                        data=content.encode('utf-8')
+                        headers=self._put_headers, 
+                        data=body
                     ) as response:
                         if response.status == 204:
-                            # 成功创建文件
+                            # 成功创建文件，无需读取响应体，立即释放连接
+                            response.release()
                             return file_path
                         else:
                             # 处理错误响应
                             try:
-                                error_data = await response.json()
+                                error_data = orjson.loads(await response.read())
                                 error_message = error_data.get('message', '未知错误')
                             except:
                                 error_message = await response.text() or f'HTTP {response.status} 错误'
@@ -271,17 +282,13 @@ class ObsidianRestAPIService:
         """
         try:
             request_url = f"{self.base_url}/"
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Accept': 'application/json'
-            }
             
             timeout = aiohttp.ClientTimeout(total=self.timeout)
             
             async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(request_url, headers=headers) as response:
+                async with session.get(request_url, headers=self._get_headers) as response:
                     if response.status == 200:
-                        data = await response.json()
+                        data = orjson.loads(await response.read())
                         return {
                             'status': 'connected',
                             'authenticated': data.get('authenticated', False),
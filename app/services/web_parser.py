@@ -4,14 +4,69 @@
 负责获取和解析网页内容。
 """
 
+import asyncio
+import codecs
 import requests
-from bs4 import BeautifulSoup
 import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+from typing import Optional, TYPE_CHECKING
 from ..services.notification import notifier
 from ..config import config
 from ..logger import logger
 from ..utils.debug_manager import debug_manager
 
+if TYPE_CHECKING:
+    from lxml.html import HtmlElement
+
+# meta 标签 (属性名, 属性值) -> (字段, 优先级)，数字越小优先级越高；
+# 单次遍历文档时据此分派，同一字段保留优先级最高且最先出现的标签
+_META_FIELDS = {
+    ('property', 'og:title'): ('title', 0),
+    ('name', 'author'): ('author', 0),
+    ('property', 'og:article:author'): ('author', 1),
+    ('property', 'article:author'): ('author', 2),
+    ('name', 'twitter:creator'): ('author', 3),
+    ('name', 'article:published_time'): ('date', 0),
+    ('property', 'article:published_time'): ('date', 1),
+    ('name', 'publishedDate'): ('date', 2),
+    ('name', 'date'): ('date', 3),
+    ('name', 'description'): ('description', 0),
+    ('property', 'og:description'): ('description', 1),
+    ('name', 'twitter:description'): ('description', 2),
+}
+_META_FIELD_COUNT = len({field for field, _ in _META_FIELDS.values()})
+
+# 预编译的正则
+# 常见日期格式合并为一个交替正则，单次扫描即可；命中的是正文中位置最靠前的日期
+_DATE_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}'  # YYYY-MM-DD
+    r'|\d{4}/\d{2}/\d{2}'  # YYYY/MM/DD
+    r'|\d{4}年\d{2}月\d{2}日'  # YYYY年MM月DD日
+)
+_WECHAT_TIME_RE = re.compile(r'var publish_time = "([^"]+)"')
+
+# 页面编码：先看响应头，再看文档开头的 <meta charset>，都没有则按 UTF-8 解码
+_HEADER_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+_CHARSET_SNIFF_BYTES = 4096
+_READ_CHUNK_SIZE = 64 * 1024
+
+# lxml 的 HTMLParser 可以复用但不是线程安全的；解析在线程池中执行，每个线程各持有一个
+_parser_local = threading.local()
+
+# 解析结果缓存：同一 URL 在有效期内重复剪藏（或下游失败后重试）时直接复用。
+# 除条目数外，还按缓存的 HTML 字符总数限制内存；单页超过上限的不缓存
+_CACHE_MAXSIZE = 64
+_CACHE_MAX_CHARS = 16 * 1024 * 1024
+_CACHE_MAX_ENTRY_CHARS = 4 * 1024 * 1024
+_CACHE_TTL = 300  # 秒
+
 
 class WebParser:
     """网页解析器
@@ -19,126 +74,276 @@ class WebParser:
     负责获取和解析网页内容，提取标题、正文和元数据。
     """
 
+    __slots__ = ('headers', 'session', '_cache', '_cache_chars', '_cache_lock')
+
     def __init__(self):
         """初始化网页解析器"""
         self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,*/*;q=0.8',
+            # 只声明本机能解压的编码（安装 brotli 后自动包含 br），解压由 urllib3 完成
+            'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding']
         }
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
-        """提取网页标题"""
-        # 1. 尝试从 meta 标签获取
-        meta_title = soup.find('meta', property='og:title')
-        if meta_title and meta_title.get('content'):
-            return meta_title['content']
+        # 复用同一个 Session，对同一站点的连续请求保持长连接，省去重复的 TCP/TLS 握手
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=20,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # URL -> (过期时间, 字符数, 解析结果)，按最近使用排序；解析在工作线程中执行，需加锁
+        self._cache: OrderedDict = OrderedDict()
+        # 缓存中 HTML 的字符总数；重定向前后两个键指向同一结果时按两份计入，偏保守
+        self._cache_chars = 0
+        self._cache_lock = threading.Lock()
+
+    def _cache_get(self, url: str) -> Optional[tuple]:
+        """读取未过期的缓存结果"""
+        with self._cache_lock:
+            entry = self._cache.get(url)
+            if entry is None:
+                return None
+            expires_at, size, result = entry
+            if expires_at <= time.monotonic():
+                del self._cache[url]
+                self._cache_chars -= size
+                return None
+            self._cache.move_to_end(url)
+            return result
+
+    def _cache_put(self, urls: tuple, result: tuple, size: int) -> None:
+        """写入缓存，条目数或字符总数超限时淘汰最久未使用的条目
+
+        Args:
+            urls: 作为缓存键的 URL
+            result: 解析结果
+            size: 结果中 HTML 的字符数，超过单页上限时不缓存
+        """
+        if size > _CACHE_MAX_ENTRY_CHARS:
+            return
+        expires_at = time.monotonic() + _CACHE_TTL
+        with self._cache_lock:
+            for url in urls:
+                old = self._cache.pop(url, None)
+                if old is not None:
+                    self._cache_chars -= old[1]
+                self._cache[url] = (expires_at, size, result)
+                self._cache_chars += size
+            while len(self._cache) > _CACHE_MAXSIZE or self._cache_chars > _CACHE_MAX_CHARS:
+                _, (_, evicted_size, _) = self._cache.popitem(last=False)
+                self._cache_chars -= evicted_size
+
+    def _fetch(self, url: str) -> tuple:
+        """流式下载网页，超过大小上限时提前中止
+
+        Returns:
+            tuple: (响应体字节, Content-Type, 重定向后的最终 URL)
+
+        Raises:
+            Exception: 网页内容超过大小上限
+        """
+        max_bytes = config.content_fetcher_builtin_max_html_bytes
+        too_large = f"网页内容过大（超过 {max_bytes} 字节）"
+
+        with self.session.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+
+            # 服务端声明的长度已超限时无需开始读取
+            content_length = response.headers.get('Content-Length', '')
+            if content_length.isdigit() and int(content_length) > max_bytes:
+                raise Exception(too_large)
+
+            chunks = []
+            total = 0
+            for chunk in response.iter_content(_READ_CHUNK_SIZE):
+                total += len(chunk)
+                if total > max_bytes:
+                    raise Exception(too_large)
+                chunks.append(chunk)
+
+            return b''.join(chunks), response.headers.get('Content-Type', ''), response.url
+
+    def _decode_html(self, raw: bytes, content_type: str) -> str:
+        """按声明的字符集解码响应内容
+
+        不使用 response.text：响应头未声明 charset 时，requests 会按 ISO-8859-1 解码 text/html，
+        其他类型则要走一遍编码探测，既慢又容易把中文页面解成乱码。
+        """
+        encoding = None
+
+        header_match = _HEADER_CHARSET_RE.search(content_type)
+        if header_match:
+            encoding = header_match.group(1)
+        elif meta_match := _META_CHARSET_RE.search(raw[:_CHARSET_SNIFF_BYTES]):
+            encoding = meta_match.group(1).decode('ascii')
+
+        try:
+            codec = codecs.lookup(encoding or 'utf-8').name
+        except LookupError:
+            codec = 'utf-8'
+        # GB2312/GBK 页面常混入扩展字符，统一按超集 GB18030 解码
+        if codec in ('gb2312', 'gbk'):
+            codec = 'gb18030'
+
+        return raw.decode(codec, errors='replace')
 
-        # 2. 尝试从 title 标签获取
-        title_tag = soup.find('title')
-        if title_tag:
-            return title_tag.text.strip()
+    def _parse_document(self, html: str) -> Optional["HtmlElement"]:
+        """用 lxml 解析 HTML，空文档返回 None"""
+        import lxml.html
+        from lxml.etree import ParserError
 
-        # 3. 尝试从 h1 标签获取
-        h1_tag = soup.find('h1')
-        if h1_tag:
-            return h1_tag.text.strip()
+        if not html.strip():
+            return None
+        # 以 UTF-8 字节交给 libxml2，避免带编码声明的 str 被拒绝解析
+        parser = getattr(_parser_local, 'parser', None)
+        if parser is None:
+            parser = _parser_local.parser = lxml.html.HTMLParser(encoding='utf-8')
+        try:
+            return lxml.html.document_fromstring(html.encode('utf-8'), parser=parser)
+        except ParserError:
+            return None
+
+    def _clean_html(self, tree: Optional["HtmlElement"], html: str) -> str:
+        """清理 HTML 内容，返回序列化后的清理结果
 
-        return ""
+        直接在文档树上把懒加载的 data-src 改名为 src，不会误改脚本或代码块中的文本。
+        """
+        import lxml.html
+
+        if tree is None:
+            return html
 
-    def _clean_html(self, html: str) -> str:
-        """清理 HTML 内容"""
         # 替换 data-src 为 src
-        html = re.sub(r'data-src="([^"]*)"', r'src="\1"', html)
-        return html
+        for element in tree.xpath('//*[@data-src]'):
+            element.set('src', element.attrib.pop('data-src'))
 
-    def _extract_meta_info(self, html: str) -> dict:
-        """提取页面元数据信息"""
-        import re
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        meta_info = {
+        return lxml.html.tostring(tree, encoding='unicode')
+
+    def _extract_all(self, tree: Optional["HtmlElement"], html: str, url: str) -> dict:
+        """单次遍历文档树，提取标题和元数据
+
+        Args:
+            tree: 已解析的文档树，空文档为 None
+            html: 原始 HTML 文本，用于日期和微信发布时间的正则兜底
+            url: 页面的最终 URL，用于判断是否为微信公众号文章
+
+        Returns:
+            dict: 包含 title、author、date、description 的信息
+        """
+        info = {
+            'title': '',
             'author': '',
             'date': '',
             'description': ''
         }
-        
-        # 1. 提取作者信息
-        # 尝试多种可能的 meta 标签
-        author_meta = (
-            soup.find('meta', {'name': 'author'}) or
-            soup.find('meta', {'property': 'og:article:author'}) or
-            soup.find('meta', {'property': 'article:author'}) or
-            soup.find('meta', {'name': 'twitter:creator'})
-        )
-        if author_meta:
-            meta_info['author'] = author_meta.get('content', '')
-        
-        # 2. 提取发布日期
-        # 尝试多种可能的 meta 标签
-        date_meta = (
-            soup.find('meta', {'name': 'article:published_time'}) or
-            soup.find('meta', {'property': 'article:published_time'}) or
-            soup.find('meta', {'name': 'publishedDate'}) or
-            soup.find('meta', {'name': 'date'})
-        )
-        if date_meta:
-            meta_info['date'] = date_meta.get('content', '')
-            
+
+        if tree is not None:
+            # 字段 -> (优先级, 内容)
+            found = {}
+            settled = 0
+            title_tag = h1_tag = None
+            for element in tree.iter('meta', 'title', 'h1'):
+                tag = element.tag
+                if tag == 'meta':
+                    for attr in ('name', 'property'):
+                        hit = _META_FIELDS.get((attr, element.get(attr)))
+                        if hit is None:
+                            continue
+                        field, priority = hit
+                        if field not in found or priority < found[field][0]:
+                            content = element.get('content', '')
+                            found[field] = (priority, content)
+                            # 内容为空的不算取到：空的 og:title 仍需回退到 <title>/<h1>
+                            if priority == 0 and content:
+                                settled += 1
+                elif tag == 'title':
+                    if title_tag is None:
+                        title_tag = element
+                elif h1_tag is None:
+                    h1_tag = element
+
+                # 所有字段都已从最高优先级的标签取到非空内容（含 og:title，无需再找
+                # <title>/<h1>），后续节点不会改变结果，提前结束遍历
+                if settled == _META_FIELD_COUNT:
+                    break
+
+            for field, (_, content) in found.items():
+                info[field] = content
+
+            # 标题优先级：og:title > <title> > 第一个 <h1>
+            if not info['title']:
+                if title_tag is not None:
+                    info['title'] = title_tag.text_content().strip()
+                elif h1_tag is not None:
+                    info['title'] = h1_tag.text_content().strip()
+
         # 如果没有找到日期，尝试在页面中查找日期格式的文本
-        if not meta_info['date']:
+        if not info['date']:
             # 匹配常见的日期格式
-            date_patterns = [
-                r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-                r'\d{4}/\d{2}/\d{2}',  # YYYY/MM/DD
-                r'\d{4}年\d{2}月\d{2}日'  # YYYY年MM月DD日
-            ]
-            for pattern in date_patterns:
-                if match := re.search(pattern, html):
-                    meta_info['date'] = match.group()
-                    break
+            if match := _DATE_RE.search(html):
+                info['date'] = match.group()
         
-        # 3. 提取描述信息
-        # 尝试多种可能的 meta 标签
-        description_meta = (
-            soup.find('meta', {'name': 'description'}) or
-            soup.find('meta', {'property': 'og:description'}) or
-            soup.find('meta', {'name': 'twitter:description'})
-        )
-        if description_meta:
-            meta_info['description'] = description_meta.get('content', '')
-        
-        # 4. 微信公众号特殊处理
-        if 'mp.weixin.qq.com' in html:
+        # 微信公众号特殊处理
+        if urlparse(url).hostname == 'mp.weixin.qq.com':
             # 微信公众号的发布时间通常在 JS 变量中
-            publish_time_match = re.search(r'var publish_time = "([^"]+)"', html)
+            publish_time_match = _WECHAT_TIME_RE.search(html)
             if publish_time_match:
-                meta_info['date'] = publish_time_match.group(1)
+                info['date'] = publish_time_match.group(1)
         
-        return meta_info
+        return info
+
+    async def parse_url(self, url: str) -> tuple:
+        """解析网页内容，返回标题、HTML、清理后的HTML、元数据和重定向后的最终 URL
+
+        抓取、解析和调试文件写入都是阻塞操作，放到线程池中执行，
+        避免阻塞事件循环，多个剪藏请求可以并发进行。
+        """
+        return await asyncio.to_thread(self._fetch_and_parse, url)
 
-    def parse_url(self, url: str) -> tuple:
-        """解析网页内容，返回标题、HTML、清理后的HTML和元数据"""
+    def _fetch_and_parse(self, url: str) -> tuple:
+        """同步抓取并解析网页（在工作线程中执行）"""
         try:
             notifier.send_progress("开始解析网页", f"正在获取网页内容: {url}")
+
+            cached = self._cache_get(url)
+            if cached is not None:
+                notifier.send_progress("网页缓存", f"命中缓存，跳过抓取: {url}")
+                title, html, cleaned_html, meta_info, final_url = cached
+                return title, html, cleaned_html, dict(meta_info), final_url
             
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
+            raw, content_type, final_url = self._fetch(url)
             
-            html = response.text
-            cleaned_html = self._clean_html(html)
+            html = self._decode_html(raw, content_type)
+            # 只解析一次：清理、标题和元数据提取共用同一棵文档树
+            tree = self._parse_document(html)
+            cleaned_html = self._clean_html(tree, html)
             
             # 保存原始 HTML（调试用）
-            debug_manager.save_file("original.html", html, prefix="web")
-            debug_manager.save_file("cleaned.html", cleaned_html, prefix="web")
+            if debug_manager.enabled:
+                debug_manager.save_file("original.html", html, prefix="web")
+                debug_manager.save_file("cleaned.html", cleaned_html, prefix="web")
             
-            # 提取标题和元数据
-            title = self._extract_title(BeautifulSoup(cleaned_html, 'html.parser'))
-            meta_info = self._extract_meta_info(html)
+            # 提取标题和元数据（单次遍历文档树）
+            meta_info = self._extract_all(tree, html, final_url)
+            title = meta_info.pop('title')
             
             if not title:
                 title = "未命名文章"
                 notifier.send_progress("警告", "未能提取到文章标题，使用默认标题")
+
+            # 同时以请求 URL 和重定向后的最终 URL 作为键，合并重定向前后的变体
+            self._cache_put(
+                (url, final_url),
+                (title, html, cleaned_html, dict(meta_info), final_url),
+                len(html) + len(cleaned_html)
+            )
             
-            return title, html, cleaned_html, meta_info
+            return title, html, cleaned_html, meta_info, final_url
             
         except requests.RequestException as e:
             error_msg = f"获取网页内容失败: {str(e)}"
@@ -5,12 +5,24 @@
 每次剪藏任务会在 debug 目录下创建一个以时间戳命名的子文件夹。
 """
 
+import functools
+import itertools
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 from ..config import config
 from ..logger import logger
 
+# 直接用 os.open/os.write 写调试文件，绕过 io 缓冲层；
+# Windows 下需加 O_BINARY，否则会把 \n 转换为 \r\n
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+
+
+@functools.lru_cache(maxsize=64)
+def _split_filename(filename: str) -> tuple:
+    """拆分文件名和扩展名（调试文件名是固定的一小组，结果可缓存）"""
+    return os.path.splitext(filename)
+
 
 class DebugManager:
     """Debug 文件管理器
@@ -20,9 +32,11 @@ class DebugManager:
     Attributes:
         base_dir: 调试文件的基础目录
         session_dir: 当前任务的调试文件目录
-        file_seq: 文件序号计数器
+        file_seq: 文件序号计数器（itertools.count）
     """
 
+    __slots__ = ('base_dir', 'session_dir', 'file_seq', '_created_dirs')
+
     def __init__(self, base_dir: str = "debug"):
         """初始化 Debug 管理器
 
@@ -31,7 +45,34 @@ class DebugManager:
         """
         self.base_dir = base_dir
         self.session_dir: Optional[str] = None
-        self.file_seq = 1
+        self.file_seq = itertools.count(1)
+        # 已确认存在的目录，避免每次保存都调用 os.makedirs
+        self._created_dirs: set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用调试文件保存
+
+        调用方应先检查此属性再构造要保存的内容，避免关闭 debug 时白白生成大字符串。
+        """
+        return config.debug
+
+    def _ensure_dir(self, target_dir: str) -> None:
+        """确保目录存在（每个目录只创建一次）"""
+        if target_dir not in self._created_dirs:
+            os.makedirs(target_dir, exist_ok=True)
+            self._created_dirs.add(target_dir)
+
+    def _write_bytes(self, filepath: str, data: bytes) -> None:
+        """将字节内容完整写入文件"""
+        fd = os.open(filepath, _WRITE_FLAGS, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+        finally:
+            os.close(fd)
 
     def start_session(self, task_id: Optional[str] = None) -> str:
         """开始新的调试会话，创建时间戳子文件夹
@@ -44,7 +85,7 @@ class DebugManager:
         Returns:
             str: 创建的会话目录路径
         """
-        if not config.debug:
+        if not self.enabled:
             return ""
 
         # 生成时间戳格式的文件夹名
@@ -52,10 +93,10 @@ class DebugManager:
         folder_name = f"{timestamp}_{task_id}" if task_id else timestamp
 
         self.session_dir = os.path.join(self.base_dir, folder_name)
-        self.file_seq = 1
+        self.file_seq = itertools.count(1)
 
         try:
-            os.makedirs(self.session_dir, exist_ok=True)
+            self._ensure_dir(self.session_dir)
             logger.debug(f"[DEBUG] 创建调试会话目录: {self.session_dir}")
         except Exception as e:
             logger.warning(f"[DEBUG] 创建调试会话目录失败: {e}")
@@ -68,7 +109,7 @@ class DebugManager:
         重置会话目录和文件序号。
         """
         self.session_dir = None
-        self.file_seq = 1
+        self.file_seq = itertools.count(1)
         logger.debug("[DEBUG] 调试会话结束")
 
     def get_session_dir(self) -> Optional[str]:
@@ -79,8 +120,8 @@ class DebugManager:
         """
         return self.session_dir
 
-    def save_file(self, filename: str, content: str, prefix: str = "") -> Optional[str]:
-        """保存调试文件
+    def save(self, filename: str, content: Union[str, bytes], prefix: str = "") -> Optional[str]:
+        """保存调试文件，文本按 UTF-8 编码，二进制内容（如图片）原样写入
 
         Args:
             filename: 文件名（不含序号前缀）
@@ -90,26 +131,27 @@ class DebugManager:
         Returns:
             Optional[str]: 保存成功返回文件路径，失败或未启用 debug 返回 None
         """
-        if not config.debug:
+        if not self.enabled:
             return None
 
         # 如果没有会话目录，使用基础目录（向后兼容）
         target_dir = self.session_dir if self.session_dir else self.base_dir
 
         try:
-            os.makedirs(target_dir, exist_ok=True)
+            self._ensure_dir(target_dir)
 
-            # 添加序号前缀
-            base, ext = os.path.splitext(filename)
+            # 添加序号前缀；next() 取号是原子的，并发保存不会拿到重复序号
+            seq = next(self.file_seq)
+            base, ext = _split_filename(filename)
             if prefix:
-                full_filename = f"{self.file_seq:02d}_{prefix}_{base}{ext}"
+                full_filename = f"{seq:02d}_{prefix}_{base}{ext}"
             else:
-                full_filename = f"{self.file_seq:02d}_{base}{ext}"
-            self.file_seq += 1
+                full_filename = f"{seq:02d}_{base}{ext}"
 
-            filepath = os.path.join(target_dir, full_filename)
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 目录由本类生成，直接拼接即可，无需 os.path.join 的分隔符处理
+            filepath = f"{target_dir}{os.sep}{full_filename}"
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            self._write_bytes(filepath, data)
 
             logger.debug(f"[DEBUG] 已保存调试文件: {filepath}")
             return filepath
@@ -118,48 +160,18 @@ class DebugManager:
             logger.warning(f"[DEBUG] 保存调试文件失败: {e}")
             return None
 
+    def save_file(self, filename: str, content: str, prefix: str = "") -> Optional[str]:
+        """保存文本调试文件，参数与返回值同 save"""
+        return self.save(filename, content, prefix)
+
     def save_binary_file(
         self,
         filename: str,
         content: bytes,
         prefix: str = ""
     ) -> Optional[str]:
-        """保存二进制调试文件（如图片）
-
-        Args:
-            filename: 文件名（不含序号前缀）
-            content: 二进制内容
-            prefix: 可选的文件名前缀
-
-        Returns:
-            Optional[str]: 保存成功返回文件路径，失败或未启用 debug 返回 None
-        """
-        if not config.debug:
-            return None
-
-        target_dir = self.session_dir if self.session_dir else self.base_dir
-
-        try:
-            os.makedirs(target_dir, exist_ok=True)
-
-            # 添加序号前缀
-            base, ext = os.path.splitext(filename)
-            if prefix:
-                full_filename = f"{self.file_seq:02d}_{prefix}_{base}{ext}"
-            else:
-                full_filename = f"{self.file_seq:02d}_{base}{ext}"
-            self.file_seq += 1
-
-            filepath = os.path.join(target_dir, full_filename)
-            with open(filepath, 'wb') as f:
-                f.write(content)
-
-            logger.debug(f"[DEBUG] 已保存二进制调试文件: {filepath}")
-            return filepath
-
-        except Exception as e:
-            logger.warning(f"[DEBUG] 保存二进制调试文件失败: {e}")
-            return None
+        """保存二进制调试文件（如图片），参数与返回值同 save"""
+        return self.save(filename, content, prefix)
 
 
 # 全局单例实例
@@ -0,0 +1,23 @@
+"""
+pytest 公共 fixture
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def yaml_funcs():
+    """routes.py 中的 YAML 生成函数
+
+    整个测试会话只导入一次；延迟到用例实际运行时才导入，
+    按标记筛选掉这些用例时，收集阶段不会加载 app 及其配置。
+    """
+    from app.api.routes import _escape_yaml_string, _format_yaml_list, generate_yaml_front_matter
+
+    return SimpleNamespace(
+        escape=_escape_yaml_string,
+        format_list=_format_yaml_list,
+        front_matter=generate_yaml_front_matter,
+    )
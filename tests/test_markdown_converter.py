@@ -1,11 +1,12 @@
 import os
 import sys
+import time
 import unittest
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.services.markdown_converter import markdown_converter
+from app.services.markdown_converter import markdown_converter, _LINK_LINE_END_RE
 
 class TestMarkdownConverter(unittest.TestCase):
     def setUp(self):
@@ -44,5 +45,47 @@ class TestMarkdownConverter(unittest.TestCase):
         print(markdown_content)
         print("=" * 80)
 
+    def test_remove_empty_spans(self):
+        """只有空白、&nbsp; 或 <br> 的 span 被移除，只包含图片的 span 保留"""
+        html = (
+            '<p>a<span>&nbsp;</span>b</p>'
+            '<p>x<span><br></span>y</p>'
+            '<p><span><img src="https://example.com/a.png"></span></p>'
+        )
+        markdown, images = markdown_converter.convert(html)
+        self.assertEqual(markdown, "ab\n\nxy\n\n![](https://example.com/a.png)")
+        self.assertEqual(images, [("https://example.com/a.png", "")])
+
+    def test_link_line_end_regex(self):
+        """测试行尾链接补换行的正则"""
+        markdown = "[标题](https://example.com)\n正文\n![图片](https://example.com/a.png)\n"
+        self.assertEqual(
+            _LINK_LINE_END_RE.sub(r'\1\n\n', markdown),
+            "[标题](https://example.com)\n\n正文\n![图片](https://example.com/a.png)\n\n"
+        )
+        # 链接文本中带一层方括号
+        markdown = "[[1] 参考](https://example.com/ref)\n[PDF [2]](https://example.com/a.pdf)\n"
+        self.assertEqual(
+            _LINK_LINE_END_RE.sub(r'\1\n\n', markdown),
+            "[[1] 参考](https://example.com/ref)\n\n[PDF [2]](https://example.com/a.pdf)\n\n"
+        )
+        # 链接地址和标题中带成对圆括号（markdownify 输出的维基百科链接）
+        markdown = ('[Python](https://en.wikipedia.org/wiki/Python_(programming_language) '
+                    '"Python (programming language)")\n下一行\n')
+        self.assertEqual(
+            _LINK_LINE_END_RE.sub(r'\1\n\n', markdown),
+            '[Python](https://en.wikipedia.org/wiki/Python_(programming_language) '
+            '"Python (programming language)")\n\n下一行\n'
+        )
+
+    def test_link_line_end_regex_unbalanced_brackets(self):
+        """括号不平衡的超长行不应触发回溯爆炸（旧的 .*? 写法在此处是平方级）"""
+        for line in ("[" * 100000, "[a](" * 25000, "[](" * 33000 + "]", "[" + "[a]" * 33000,
+                     "[a](" + "(" * 80000, "[a](" + "(a)" * 30000, "[a]((" * 20000):
+            markdown = line + "\n"
+            start = time.time()
+            self.assertEqual(_LINK_LINE_END_RE.sub(r'\1\n\n', markdown), markdown)
+            self.assertLess(time.time() - start, 1.0)
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,228 @@
+"""
+网页解析器单元测试
+
+不发起真实网络请求：用假响应替换 session.get，验证抓取、解码、缓存以及标题和元数据提取。
+"""
+
+import pytest
+
+from app.config import config
+from app.services import web_parser as web_parser_module
+from app.services.web_parser import WebParser
+
+pytestmark = [pytest.mark.unit]
+
+_URL = "https://example.com/article"
+
+
+@pytest.fixture
+def parser():
+    """每个用例使用独立的解析器实例（缓存互不影响）"""
+    return WebParser()
+
+
+class _FakeResponse:
+    """模拟 requests 的流式响应，记录实际读取的分块数"""
+
+    def __init__(self, body: bytes, headers: dict = None, url: str = _URL):
+        self.body = body
+        self.headers = headers if headers is not None else {'Content-Type': 'text/html; charset=utf-8'}
+        self.url = url
+        self.chunks_read = 0
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            self.chunks_read += 1
+            yield self.body[start:start + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _serve(monkeypatch, parser, response: _FakeResponse) -> list:
+    """让 parser.session.get 返回指定响应，返回记录请求 URL 的列表"""
+    requested = []
+
+    def fake_get(url, **kwargs):
+        requested.append(url)
+        return response
+
+    monkeypatch.setattr(parser.session, 'get', fake_get)
+    return requested
+
+
+def _extract(parser, html: str, url: str = _URL) -> dict:
+    """解析 HTML 并提取标题和元数据"""
+    return parser._extract_all(parser._parse_document(html), html, url)
+
+
+class TestExtractAll:
+    """测试 _extract_all 方法"""
+
+    def test_all_meta_fields(self, parser):
+        """最高优先级的 meta 标签齐全时，全部取 meta 内容"""
+        html = (
+            '<html><head>'
+            '<meta property="og:title" content="OG 标题">'
+            '<meta name="author" content="作者">'
+            '<meta name="article:published_time" content="2024-01-01">'
+            '<meta name="description" content="描述">'
+            '<title>页面标题</title>'
+            '</head><body><h1>正文标题</h1></body></html>'
+        )
+        assert _extract(parser, html) == {
+            'title': 'OG 标题',
+            'author': '作者',
+            'date': '2024-01-01',
+            'description': '描述',
+        }
+
+    def test_empty_og_title_falls_back_to_title_tag(self, parser):
+        """og:title 内容为空时回退到 <title>，即使其余 meta 都在 <title> 之前"""
+        html = (
+            '<html><head>'
+            '<meta property="og:title" content="">'
+            '<meta name="author" content="作者">'
+            '<meta name="article:published_time" content="2024-01-01">'
+            '<meta name="description" content="描述">'
+            '<title>Real Title</title>'
+            '</head><body><h1>正文标题</h1></body></html>'
+        )
+        assert _extract(parser, html)['title'] == 'Real Title'
+
+    def test_h1_fallback(self, parser):
+        """没有 og:title 和 <title> 时使用第一个 <h1>"""
+        html = '<html><body><h1> 第一个 </h1><h1>第二个</h1></body></html>'
+        assert _extract(parser, html)['title'] == '第一个'
+
+    def test_meta_priority(self, parser):
+        """同一字段取优先级最高的标签，与出现顺序无关"""
+        html = (
+            '<html><head>'
+            '<meta name="twitter:description" content="低优先级">'
+            '<meta name="description" content="高优先级">'
+            '</head><body></body></html>'
+        )
+        assert _extract(parser, html)['description'] == '高优先级'
+
+
+class TestFetch:
+    """测试 _fetch 的流式下载和大小上限"""
+
+    def test_returns_body_content_type_and_final_url(self, parser, monkeypatch):
+        """返回完整响应体、Content-Type 和重定向后的最终 URL"""
+        body = "<html><body>正文</body></html>".encode('utf-8')
+        headers = {'Content-Type': 'text/html; charset=utf-8'}
+        _serve(monkeypatch, parser, _FakeResponse(body, headers, url="https://example.com/final"))
+        assert parser._fetch(_URL) == (body, 'text/html; charset=utf-8', "https://example.com/final")
+
+    def test_content_length_over_limit(self, parser, monkeypatch):
+        """Content-Length 已超限时不读取响应体"""
+        monkeypatch.setattr(type(config), 'content_fetcher_builtin_max_html_bytes', 1024)
+        response = _FakeResponse(b'x' * 2048, {'Content-Type': 'text/html', 'Content-Length': '2048'})
+        _serve(monkeypatch, parser, response)
+        with pytest.raises(Exception, match="网页内容过大"):
+            parser._fetch(_URL)
+        assert response.chunks_read == 0
+
+    def test_streamed_body_over_limit(self, parser, monkeypatch):
+        """未声明长度时，读取过程中超限即中止，不再读取剩余分块"""
+        monkeypatch.setattr(type(config), 'content_fetcher_builtin_max_html_bytes', 1024)
+        chunk_size = web_parser_module._READ_CHUNK_SIZE
+        response = _FakeResponse(b'x' * (chunk_size * 4), {'Content-Type': 'text/html'})
+        _serve(monkeypatch, parser, response)
+        with pytest.raises(Exception, match="网页内容过大"):
+            parser._fetch(_URL)
+        assert response.chunks_read == 1
+
+
+class TestDecodeHtml:
+    """测试 _decode_html 的字符集判断"""
+
+    def test_header_charset(self, parser):
+        """优先使用响应头声明的字符集，GBK 按超集 GB18030 解码"""
+        raw = "中文标题".encode('gbk')
+        assert parser._decode_html(raw, 'text/html; charset=GBK') == "中文标题"
+
+    def test_meta_charset(self, parser):
+        """响应头未声明时使用文档开头的 <meta charset>"""
+        raw = '<html><head><meta charset="gb2312"></head><body>中文</body></html>'.encode('gb18030')
+        assert parser._decode_html(raw, 'text/html') == '<html><head><meta charset="gb2312"></head><body>中文</body></html>'
+
+    def test_default_utf8(self, parser):
+        """都未声明时按 UTF-8 解码，而不是 ISO-8859-1"""
+        assert parser._decode_html("中文".encode('utf-8'), 'text/html') == "中文"
+
+    def test_unknown_charset_falls_back_to_utf8(self, parser):
+        """无法识别的字符集回退到 UTF-8"""
+        assert parser._decode_html("中文".encode('utf-8'), 'text/html; charset=x-unknown') == "中文"
+
+
+class TestCache:
+    """测试解析结果缓存"""
+
+    _HTML = '<html><head><title>缓存标题</title></head><body>正文</body></html>'
+
+    def test_repeated_url_hits_cache(self, parser, monkeypatch):
+        """同一 URL 在有效期内只抓取一次，重定向后的最终 URL 同样命中"""
+        final_url = "https://example.com/final"
+        requested = _serve(monkeypatch, parser, _FakeResponse(self._HTML.encode('utf-8'), url=final_url))
+
+        first = parser._fetch_and_parse(_URL)
+        assert first[0] == '缓存标题'
+        assert first[4] == final_url
+        assert parser._fetch_and_parse(_URL) == first
+        assert parser._fetch_and_parse(final_url) == first
+        assert requested == [_URL]
+
+    def test_expired_entry_refetched(self, parser, monkeypatch):
+        """超过有效期的缓存不再使用"""
+        requested = _serve(monkeypatch, parser, _FakeResponse(self._HTML.encode('utf-8')))
+        now = 1000.0
+        monkeypatch.setattr(web_parser_module.time, 'monotonic', lambda: now)
+
+        parser._fetch_and_parse(_URL)
+        now += web_parser_module._CACHE_TTL + 1
+        parser._fetch_and_parse(_URL)
+        assert requested == [_URL, _URL]
+
+    def test_evicts_least_recently_used(self, parser):
+        """超出容量时淘汰最久未使用的条目"""
+        maxsize = web_parser_module._CACHE_MAXSIZE
+        for i in range(maxsize):
+            parser._cache_put((f"https://example.com/{i}",), (str(i),), 1)
+        # 访问第 0 条，使第 1 条成为最久未使用的条目
+        assert parser._cache_get("https://example.com/0") == ("0",)
+        parser._cache_put(("https://example.com/new",), ("new",), 1)
+
+        assert parser._cache_get("https://example.com/1") is None
+        assert parser._cache_get("https://example.com/0") == ("0",)
+        assert len(parser._cache) == maxsize
+
+    def test_evicts_by_total_chars(self, parser, monkeypatch):
+        """字符总数超限时淘汰最久未使用的条目"""
+        monkeypatch.setattr(web_parser_module, '_CACHE_MAX_CHARS', 100)
+        parser._cache_put(("https://example.com/a",), ("a",), 60)
+        parser._cache_put(("https://example.com/b",), ("b",), 30)
+        parser._cache_put(("https://example.com/c",), ("c",), 30)
+
+        assert parser._cache_get("https://example.com/a") is None
+        assert parser._cache_get("https://example.com/b") == ("b",)
+        assert parser._cache_get("https://example.com/c") == ("c",)
+        assert parser._cache_chars == 60
+
+    def test_large_page_not_cached(self, parser, monkeypatch):
+        """超过单页上限的页面不缓存，每次都重新抓取"""
+        monkeypatch.setattr(web_parser_module, '_CACHE_MAX_ENTRY_CHARS', 10)
+        requested = _serve(monkeypatch, parser, _FakeResponse(self._HTML.encode('utf-8')))
+
+        parser._fetch_and_parse(_URL)
+        parser._fetch_and_parse(_URL)
+        assert requested == [_URL, _URL]
+        assert parser._cache_chars == 0
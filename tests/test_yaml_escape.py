@@ -5,145 +5,153 @@ YAML 转义功能单元测试
 生成的 YAML 可被正确解析。
 """
 
-import os
-import sys
 import pytest
 import yaml
 
-# 添加项目根目录到 Python 路径
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# 测试只关心字符串能否原样还原，使用不做隐式类型推断（时间戳、数字、布尔值）的 BaseLoader，
+# 所有纯量都解析为 str；优先使用 libyaml 的 C 实现，未编译 libyaml 时回退到纯 Python 版本
+try:
+    from yaml import CBaseLoader as _Loader
+except ImportError:
+    from yaml import BaseLoader as _Loader
 
-from app.api.routes import _format_yaml_list, _escape_yaml_string, generate_yaml_front_matter
+# 往返解析时包裹被测值的 YAML 键
+_TEST_KEY = "test"
+_TEST_PREFIX = _TEST_KEY + ": "
+
+# 本文件的用例均为纯函数测试，无共享可变状态，可安全地并行执行
+pytestmark = [pytest.mark.unit]
+
+
+def _parse(text: str):
+    """解析 YAML 文本（所有纯量均为字符串）"""
+    return yaml.load(text, Loader=_Loader)
+
+
+def _parse_front_matter(text: str):
+    """解析 front matter，取 --- 分隔的第一个文档"""
+    return next(yaml.load_all(text, Loader=_Loader))
 
 
 class TestEscapeYamlString:
     """测试 _escape_yaml_string 函数"""
 
-    def test_plain_text_no_escape(self):
+    def test_plain_text_no_escape(self, yaml_funcs):
         """普通文本不需要转义"""
-        assert _escape_yaml_string("普通文本") == "普通文本"
-        assert _escape_yaml_string("Hello World") == "Hello World"
+        assert yaml_funcs.escape("普通文本") == "普通文本"
+        assert yaml_funcs.escape("Hello World") == "Hello World"
 
-    def test_empty_string(self):
+    def test_empty_string(self, yaml_funcs):
         """空字符串返回空"""
-        assert _escape_yaml_string("") == ""
-        assert _escape_yaml_string(None) == ""
+        assert yaml_funcs.escape("") == ""
+        assert yaml_funcs.escape(None) == ""
 
-    def test_escape_colon(self):
+    def test_escape_colon(self, yaml_funcs):
         """包含冒号的字符串需要引号包裹"""
-        result = _escape_yaml_string("key: value")
-        assert result.startswith('"')
-        assert result.endswith('"')
-        # 验证可被 YAML 解析
-        parsed = yaml.safe_load(f"test: {result}")
-        assert parsed["test"] == "key: value"
+        assert yaml_funcs.escape("key: value") == '"key: value"'
 
-    def test_escape_double_quotes(self):
+    def test_escape_double_quotes(self, yaml_funcs):
         """双引号需要转义"""
-        result = _escape_yaml_string('包含"引号"的文本')
-        assert '\\"' in result
-        # 验证可被 YAML 解析
-        parsed = yaml.safe_load(f"test: {result}")
-        assert parsed["test"] == '包含"引号"的文本'
+        assert yaml_funcs.escape('包含"引号"的文本') == '"包含\\"引号\\"的文本"'
 
-    def test_escape_backslash(self):
+    def test_escape_backslash(self, yaml_funcs):
         """反斜杠需要转义"""
-        result = _escape_yaml_string("路径\\文件")
-        assert "\\\\" in result
-        # 验证可被 YAML 解析
-        parsed = yaml.safe_load(f"test: {result}")
-        assert parsed["test"] == "路径\\文件"
+        assert yaml_funcs.escape("路径\\文件") == '"路径\\\\文件"'
 
-    def test_escape_hash(self):
+    def test_escape_hash(self, yaml_funcs):
         """井号需要引号包裹（避免被解析为注释）"""
-        result = _escape_yaml_string("标签 #tag")
-        assert result.startswith('"')
-        # 验证可被 YAML 解析
-        parsed = yaml.safe_load(f"test: {result}")
-        assert parsed["test"] == "标签 #tag"
-
-    def test_escape_newline(self):
-        """换行符需要引号包裹
-
-        注意：YAML 规范中，双引号字符串的换行符会被规范化为空格，
-        这是预期行为。重要的是字符串能被正确解析，不会破坏 YAML 结构。
-        """
-        result = _escape_yaml_string("第一行\n第二行")
-        assert result.startswith('"')
-        # 验证可被 YAML 解析（换行符会被规范化为空格）
-        parsed = yaml.safe_load(f"test: {result}")
-        assert parsed["test"] is not None
-        assert "第一行" in parsed["test"]
-        assert "第二行" in parsed["test"]
-
-    def test_complex_string_with_code(self):
+        assert yaml_funcs.escape("标签 #tag") == '"标签 #tag"'
+
+    def test_escape_newline(self, yaml_funcs):
+        """换行符需要引号包裹，并转义为 \\n（解析后原样保留，而不是被折叠为空格）"""
+        assert yaml_funcs.escape("第一行\n第二行") == '"第一行\\n第二行"'
+
+    def test_escape_carriage_return(self, yaml_funcs):
+        """回车符同样会截断纯量，需要引号包裹并转义"""
+        assert yaml_funcs.escape("第一行\r第二行") == '"第一行\\r第二行"'
+
+    def test_escape_control_chars(self, yaml_funcs):
+        """控制字符不能裸写在 YAML 中，需要转义"""
+        assert yaml_funcs.escape("响铃\x07与空字符\x00") == '"响铃\\x07与空字符\\x00"'
+        # Unicode 行/段分隔符会被当作换行，U+FFFE/U+FFFF 不是合法的 YAML 字符
+        assert yaml_funcs.escape("行分隔\u2028段分隔\u2029") == '"行分隔\\u2028段分隔\\u2029"'
+        assert yaml_funcs.escape("非字符\ufffe\uffff") == '"非字符\\ufffe\\uffff"'
+
+    def test_escape_tab_and_trailing_space(self, yaml_funcs):
+        """制表符需要转义；末尾空格会在解析时被裁掉，需要引号包裹"""
+        assert yaml_funcs.escape("结尾制表符\t") == '"结尾制表符\\t"'
+        assert yaml_funcs.escape("中间\t制表符") == '"中间\\t制表符"'
+        assert yaml_funcs.escape("结尾空格 ") == '"结尾空格 "'
+
+    def test_escape_leading_indicator(self, yaml_funcs):
+        """以 YAML 指示符或空白开头的字符串需要引号包裹（否则会被当作别名、序列等）"""
+        assert yaml_funcs.escape("*star") == '"*star"'
+        assert yaml_funcs.escape("- 列表项") == '"- 列表项"'
+        assert yaml_funcs.escape(" 前导空格") == '" 前导空格"'
+        assert yaml_funcs.escape(",逗号") == '",逗号"'
+
+    def test_leading_digit_no_escape(self, yaml_funcs):
+        """数字开头的日期、数值保持原样"""
+        assert yaml_funcs.escape("2024-01-01") == "2024-01-01"
+
+    def test_complex_string_with_code(self, yaml_funcs):
         """复杂字符串：包含代码引用的内容（模拟 LLM 返回的 golden_sentences）"""
         text = 'TTRSS 在 HTML 中会对图片链接增加 `referrerpolicy="no-referrer"` 属性'
-        result = _escape_yaml_string(text)
+        result = yaml_funcs.escape(text)
         # 验证可被 YAML 解析
-        parsed = yaml.safe_load(f"test: {result}")
-        assert parsed["test"] == text
+        parsed = _parse(_TEST_PREFIX + result)
+        assert parsed[_TEST_KEY] == text
+
+    def test_escaped_strings_roundtrip(self, yaml_funcs):
+        """转义结果可被 YAML 原样解析（上面各用例的期望值均为合法 YAML）"""
+        texts = ["key: value", '包含"引号"的文本', "路径\\文件", "标签 #tag",
+                 "第一行\n第二行", "第一行\r第二行", "响铃\x07与空字符\x00",
+                 "*star", "- 列表项", " 前导空格", "&锚点", "!标签", "|管道", ">引用", "@用户", "`代码`", "%百分号",
+                 ",逗号", "结尾制表符\t", "中间\t制表符", "结尾空格 ",
+                 "行分隔\u2028段分隔\u2029", "非字符\ufffe\uffff"]
+        document = "\n".join(f"k{i}: {yaml_funcs.escape(text)}" for i, text in enumerate(texts))
+        parsed = _parse(document)
+        assert [parsed[f"k{i}"] for i in range(len(texts))] == texts
 
 
 class TestFormatYamlList:
     """测试 _format_yaml_list 函数"""
 
-    def test_empty_list(self):
+    def test_empty_list(self, yaml_funcs):
         """空列表返回 []"""
-        assert _format_yaml_list([]) == "[]"
-
-    def test_simple_list(self):
-        """简单列表格式化"""
-        result = _format_yaml_list(["item1", "item2"])
-        yaml_str = f"test:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["test"] == ["item1", "item2"]
-
-    def test_list_with_double_quotes(self):
-        """列表项包含双引号"""
-        items = ['包含"引号"的文本', '另一个"引号"项']
-        result = _format_yaml_list(items)
-        yaml_str = f"test:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["test"] == items
-
-    def test_list_with_backslash(self):
-        """列表项包含反斜杠"""
-        items = ["路径\\文件", "C:\\Users\\test"]
-        result = _format_yaml_list(items)
-        yaml_str = f"test:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["test"] == items
-
-    def test_list_with_code_references(self):
-        """列表项包含代码引用（模拟真实场景）"""
-        items = [
+        assert yaml_funcs.format_list([]) == "[]"
+
+    @pytest.mark.parametrize("items", [
+        # 简单列表
+        pytest.param(["item1", "item2"], id="simple"),
+        # 列表项包含双引号
+        pytest.param(['包含"引号"的文本', '另一个"引号"项'], id="double_quotes"),
+        # 列表项包含反斜杠
+        pytest.param(["路径\\文件", "C:\\Users\\test"], id="backslash"),
+        # 列表项包含代码引用（模拟真实场景）
+        pytest.param([
             '使用 `referrerpolicy="no-referrer"` 属性',
             '匹配头 `(Host:.+)(\\r\\n)`',
             '替换为 `$1$2Referer: sspai.com$2`',
-        ]
-        result = _format_yaml_list(items)
-        yaml_str = f"test:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["test"] == items
-
-    def test_list_with_mixed_special_chars(self):
-        """列表项包含多种特殊字符"""
-        items = [
+        ], id="code_references"),
+        # 列表项包含多种特殊字符
+        pytest.param([
             "包含冒号: 和井号 #tag",
             '包含引号 "quoted" 和反斜杠 \\path',
             "包含方括号 [array] 和花括号 {object}",
-        ]
-        result = _format_yaml_list(items)
-        yaml_str = f"test:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["test"] == items
+        ], id="mixed_special_chars"),
+    ])
+    def test_list_roundtrip(self, yaml_funcs, items):
+        """格式化后的列表可被 YAML 原样解析"""
+        result = yaml_funcs.format_list(items)
+        parsed = _parse(_TEST_PREFIX + result)
+        assert parsed[_TEST_KEY] == items
 
 
 class TestGenerateYamlFrontMatter:
     """测试 generate_yaml_front_matter 函数"""
 
-    def test_basic_front_matter(self):
+    def test_basic_front_matter(self, yaml_funcs):
         """基本 front matter 生成"""
         url = "https://example.com/article"
         title = "测试文章"
@@ -153,42 +161,38 @@ class TestGenerateYamlFrontMatter:
             "date": "2024-01-01",
         }
 
-        result = generate_yaml_front_matter(url, title, meta_info)
+        result = yaml_funcs.front_matter(url, title, meta_info)
 
-        # 提取 YAML 内容（去掉开头和结尾的 ---）
-        yaml_content = result.strip().strip("-").strip()
-        parsed = yaml.safe_load(yaml_content)
+        parsed = _parse_front_matter(result)
 
         assert parsed["url"] == url
         assert parsed["title"] == title
         assert parsed["description"] == "这是描述"
         assert parsed["author"] == "作者"
 
-    def test_front_matter_with_special_url(self):
+    def test_front_matter_with_special_url(self, yaml_funcs):
         """URL 包含特殊字符"""
         url = "https://example.com/article?id=123#section"
         title = "测试"
         meta_info = {"description": "", "author": "", "date": ""}
 
-        result = generate_yaml_front_matter(url, title, meta_info)
-        yaml_content = result.strip().strip("-").strip()
-        parsed = yaml.safe_load(yaml_content)
+        result = yaml_funcs.front_matter(url, title, meta_info)
+        parsed = _parse_front_matter(result)
 
         assert parsed["url"] == url
 
-    def test_front_matter_with_special_title(self):
+    def test_front_matter_with_special_title(self, yaml_funcs):
         """标题包含特殊字符"""
         url = "https://example.com"
         title = '标题包含"引号"和冒号: 以及 #标签'
         meta_info = {"description": "", "author": "", "date": ""}
 
-        result = generate_yaml_front_matter(url, title, meta_info)
-        yaml_content = result.strip().strip("-").strip()
-        parsed = yaml.safe_load(yaml_content)
+        result = yaml_funcs.front_matter(url, title, meta_info)
+        parsed = _parse_front_matter(result)
 
         assert parsed["title"] == title
 
-    def test_front_matter_with_iso_date(self):
+    def test_front_matter_with_iso_date(self, yaml_funcs):
         """ISO 8601 格式的日期"""
         url = "https://example.com"
         title = "测试"
@@ -198,48 +202,37 @@ class TestGenerateYamlFrontMatter:
             "date": "2024-10-13T11:22:28+08:00",
         }
 
-        result = generate_yaml_front_matter(url, title, meta_info)
-        yaml_content = result.strip().strip("-").strip()
-        parsed = yaml.safe_load(yaml_content)
+        result = yaml_funcs.front_matter(url, title, meta_info)
+        parsed = _parse_front_matter(result)
 
         # ISO 日期包含冒号，应该被正确处理
-        assert "2024-10-13" in str(parsed["published"])
+        assert parsed["published"].startswith("2024-10-13")
 
 
 class TestRealWorldScenarios:
     """真实场景测试：模拟实际 LLM 返回的内容"""
 
-    def test_golden_sentences_with_code(self):
-        """golden_sentences 包含代码引用"""
-        items = [
+    @pytest.mark.parametrize("key, items", [
+        # golden_sentences 包含代码引用
+        pytest.param("golden_sentences", [
             "一般的图片防盗链功能是通过检测 HTTP 请求头中的 `Referer` 字段是否是合法的域名实现的。",
             'TTRSS 在 HTML 中会对图片链接增加 `referrerpolicy="no-referrer"` 属性，这个属性会在请求图片时不发送任何 `Referer` 信息。',
-        ]
-        result = _format_yaml_list(items)
-        yaml_str = f"golden_sentences:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["golden_sentences"] == items
-
-    def test_hidden_info_with_quotes(self):
-        """hidden_info 包含引号"""
-        items = [
+        ], id="golden_sentences_with_code"),
+        # hidden_info 包含引号
+        pytest.param("hidden_info", [
             '使用QX工具时，重写规则中的"Replacement"字段不支持直接插入换行符。',
             '必须将目标域名添加到QX的MitM配置的Hostnames列表中。',
-        ]
-        result = _format_yaml_list(items)
-        yaml_str = f"hidden_info:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["hidden_info"] == items
-
-    def test_paragraphs_with_complex_content(self):
-        """paragraphs 包含复杂内容"""
-        items = [
+        ], id="hidden_info_with_quotes"),
+        # paragraphs 包含复杂内容
+        pytest.param("paragraphs", [
             "进阶解法：使用QX拦截HTTPS流量。具体步骤包括创建重写规则：类型为`request-header`，匹配URL模式`^https://cdnfile\\.sspai\\.com/`。",
-        ]
-        result = _format_yaml_list(items)
-        yaml_str = f"paragraphs:{result}"
-        parsed = yaml.safe_load(yaml_str)
-        assert parsed["paragraphs"] == items
+        ], id="paragraphs_with_complex_content"),
+    ])
+    def test_llm_list_field(self, yaml_funcs, key, items):
+        """LLM 返回的列表字段可被 YAML 原样解析"""
+        result = yaml_funcs.format_list(items)
+        parsed = _parse(key + ":" + result)
+        assert parsed[key] == items
 
 
 if __name__ == "__main__":